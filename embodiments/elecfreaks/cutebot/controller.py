@@ -10,8 +10,62 @@ Copyright 2016-2025 Neuraville Inc. All Rights Reserved.
 
 import asyncio
 import argparse
+import functools
+import struct
 from feagi.agent import BluetoothRobot
 
+# uvloop (libuv event loop) speeds up BLE notification handling where it is
+# installed; Windows and minimal installs use the default asyncio loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+# Binary sensor frames: [type:u8][payload], little-endian, one frame per
+# notification. Gyro/accelerometer axes are int16 hundredths, infrared is two
+# u8 flags and ultrasonic is a u16 distance in centimetres.
+_GYRO_TYPE = 0x01
+_ACC_TYPE = 0x02
+_IR_TYPE = 0x03
+_US_TYPE = 0x04
+
+_GYRO_FMT = struct.Struct('<Bhhh')
+_ACC_FMT = struct.Struct('<Bhhh')
+_IR_FMT = struct.Struct('<BBB')
+_US_FMT = struct.Struct('<BH')
+
+_AXIS_SCALE = 1.0 / 100.0
+
+
+def _decode_gyro(raw_bytes: bytes) -> dict:
+    _, x, y, z = _GYRO_FMT.unpack_from(raw_bytes)
+    return {'gyro': {'0': [x * _AXIS_SCALE, y * _AXIS_SCALE, z * _AXIS_SCALE]}}
+
+
+def _decode_accelerometer(raw_bytes: bytes) -> dict:
+    _, x, y, z = _ACC_FMT.unpack_from(raw_bytes)
+    return {'accelerometer': {'0': [x * _AXIS_SCALE, y * _AXIS_SCALE, z * _AXIS_SCALE]}}
+
+
+def _decode_infrared(raw_bytes: bytes) -> dict:
+    _, left, right = _IR_FMT.unpack_from(raw_bytes)
+    return {'infrared': {'0': left, '1': right}}
+
+
+def _decode_ultrasonic(raw_bytes: bytes) -> dict:
+    _, distance = _US_FMT.unpack_from(raw_bytes)
+    return {'proximity': {'0': float(distance)}}
+
+
+# Frame type -> (frame size, decoder); one dict lookup per notification
+_FRAME_DECODERS = {
+    _GYRO_TYPE: (_GYRO_FMT.size, _decode_gyro),
+    _ACC_TYPE: (_ACC_FMT.size, _decode_accelerometer),
+    _IR_TYPE: (_IR_FMT.size, _decode_infrared),
+    _US_TYPE: (_US_FMT.size, _decode_ultrasonic),
+}
+
 
 class CutebotRobot(BluetoothRobot):
     """
@@ -20,6 +74,9 @@ class CutebotRobot(BluetoothRobot):
     Only ~35 lines of robot-specific code!
     """
     
+    # No instance attributes of its own; all state lives in BluetoothRobot
+    __slots__ = ()
+    
     # Bluetooth configuration (from embodiment.json)
     BLUETOOTH_CONFIG = {
         "device_name": "BBC micro:bit",
@@ -32,25 +89,39 @@ class CutebotRobot(BluetoothRobot):
         """
         Parse Cutebot's sensor data.
         
-        Cutebot (micro:bit) sends:
+        Cutebot (micro:bit) sends binary frames (see _*_FMT above):
+        - Gyro: [0x01][x:i16][y:i16][z:i16]
+        - Accelerometer: [0x02][x:i16][y:i16][z:i16]
+        - IR sensors: [0x03][left:u8][right:u8]
+        - Ultrasonic: [0x04][dist:u16]
+        
+        Older firmware sends ASCII instead, which is still accepted:
         - Gyro: "Gx,y,z#"
         - Accelerometer: "Ax,y,z#"
         - IR sensors: "I0,1#"
         - Ultrasonic: "Udist#"
         """
+        decoder = _FRAME_DECODERS.get(raw_bytes[0]) if raw_bytes else None
+        if decoder is not None and len(raw_bytes) == decoder[0]:
+            return decoder[1](raw_bytes)
+        
+        return self._parse_text_sensors(raw_bytes)
+    
+    def _parse_text_sensors(self, raw_bytes: bytes) -> dict:
+        """Parse the legacy ASCII sensor format ("Gx,y,z#", ...)."""
         try:
-            data_str = raw_bytes.decode('utf-8').strip()
-            
-            if not '#' in data_str:
+            # Drop line endings and cut at the terminator in single C passes;
+            # nothing is decoded (float()/int() accept bytes)
+            head, sep, _ = raw_bytes.translate(None, b'\r\n').partition(b'#')
+            if not sep:
                 return {}
             
-            # Split and clean
-            data_str = data_str.replace('\r', '').replace('\n', '')
-            values_str = data_str.split('#')[0]
+            head = head.strip()
+            prefix = head[:1]
             
             # Parse based on prefix
-            if values_str.startswith('G'):  # Gyro
-                values = [float(v) for v in values_str[1:].split(',') if v]
+            if prefix == b'G':  # Gyro
+                values = [float(v) for v in head[1:].split(b',') if v]
                 if len(values) >= 3:
                     return {
                         'gyro': {
@@ -58,8 +129,8 @@ class CutebotRobot(BluetoothRobot):
                         }
                     }
             
-            elif values_str.startswith('A'):  # Accelerometer
-                values = [float(v) for v in values_str[1:].split(',') if v]
+            elif prefix == b'A':  # Accelerometer
+                values = [float(v) for v in head[1:].split(b',') if v]
                 if len(values) >= 3:
                     return {
                         'accelerometer': {
@@ -67,8 +138,8 @@ class CutebotRobot(BluetoothRobot):
                         }
                     }
             
-            elif values_str.startswith('I'):  # Infrared
-                values = [int(v) for v in values_str[1:].split(',') if v]
+            elif prefix == b'I':  # Infrared
+                values = [int(v) for v in head[1:].split(b',') if v]
                 if len(values) >= 2:
                     return {
                         'infrared': {
@@ -77,8 +148,8 @@ class CutebotRobot(BluetoothRobot):
                         }
                     }
             
-            elif values_str.startswith('U'):  # Ultrasonic
-                distance = float(values_str[1:])
+            elif prefix == b'U':  # Ultrasonic
+                distance = float(head[1:])
                 return {
                     'proximity': {
                         '0': distance
@@ -86,7 +157,7 @@ class CutebotRobot(BluetoothRobot):
                 }
         
         except Exception as e:
-            self.logger.warning(f"Error parsing sensor data: {e}")
+            self.logger.warning("Error parsing sensor data: %s", e)
         
         return {}
     
@@ -110,20 +181,25 @@ class CutebotRobot(BluetoothRobot):
                 return command.encode()
         
         except Exception as e:
-            self.logger.warning(f"Error formatting motor command: {e}")
+            self.logger.warning("Error formatting motor command: %s", e)
         
         return b''
 
 
-def main():
-    """Main entry point"""
+@functools.cache
+def _arg_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser once and reuse it."""
     parser = argparse.ArgumentParser(description="Cutebot Bluetooth Controller")
     parser.add_argument('--agent-id', default='cutebot-001', help='Agent ID')
     parser.add_argument('--feagi-host', default='localhost', help='FEAGI host')
     parser.add_argument('--feagi-port', type=int, default=3000, help='FEAGI port')
     parser.add_argument('--platform', choices=['desktop', 'cloud'], help='Platform override')
-    
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """Main entry point"""
+    args = _arg_parser().parse_args()
     
     # Create and run robot
     robot = CutebotRobot(
@@ -134,6 +210,8 @@ def main():
     )
     
     # Run async
+    if uvloop is not None:
+        uvloop.install()
     try:
         asyncio.run(robot.run())
     except KeyboardInterrupt:
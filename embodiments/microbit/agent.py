@@ -6,9 +6,12 @@ Connects to micro:bit via Bluetooth Low Energy and bridges to FEAGI Core.
 Receives neuron firing data from FEAGI and sends it to micro:bit LED matrix.
 """
 
+import argparse
 import asyncio
+import functools
 import json
 import logging
+from itertools import chain
 from typing import Optional, Dict, Any
 import sys
 import os
@@ -29,6 +32,21 @@ except ImportError:
     print("ERROR: bleak not installed. Install with: pip install bleak")
     sys.exit(1)
 
+# uvloop (libuv event loop) speeds up BLE notification handling where it is
+# installed; Windows and minimal installs use the default asyncio loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# orjson decodes FEAGI motor frames in C; the stdlib decoder is the fallback.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so handlers match.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # BLE Service UUIDs (from firmware bluetooth.rs)
 FEAGI_SERVICE_UUID = "e95d0753-251d-470a-a062-fa1922dfa9a8"
 NEURON_DATA_CHAR_UUID = "e95d0755-251d-470a-a062-fa1922dfa9a8"  # Write characteristic for neuron data
@@ -38,12 +56,29 @@ CAPABILITIES_CHAR_UUID = "e95d0758-251d-470a-a062-fa1922dfa9a8"  # Read characte
 # Device name (from firmware config)
 MICROBIT_NAME = "FEAGI-microbit"  # Update this to match BLUETOOTH_NAME in firmware
 
+# Neuron firing frames are coalesced: the firmware redraws the whole matrix
+# per frame and keeps one RX slot, so only the newest frame queued within
+# this many seconds is written
+BATCH_FLUSH_INTERVAL = 0.02
+ATT_HEADER_SIZE = 3
+# Capacity of the reusable frame buffer (ATT maximum attribute length)
+MAX_BATCH_SIZE = 512
+
+# Depth of the outgoing write queue (mirrors the SoftDevice TX queue)
+TX_QUEUE_SIZE = 16
+
 logger = logging.getLogger(__name__)
 
 
 class MicrobitBleAgent:
     """Agent that bridges FEAGI Core to micro:bit via BLE."""
     
+    __slots__ = (
+        'feagi_host', 'agent_id', 'feagi_client', 'ble_client', 'neuron_char',
+        'connected', '_pkt', '_pkt_view', '_pkt_len', '_flush_task',
+        '_tx_queue', '_writer_task', '_write_response', '_led_area_id',
+    )
+    
     def __init__(self, feagi_host: str = "localhost", agent_id: str = "microbit-agent"):
         self.feagi_host = feagi_host
         self.agent_id = agent_id
@@ -51,28 +86,33 @@ class MicrobitBleAgent:
         self.ble_client: Optional[BleakClient] = None
         self.neuron_char: Optional[BleakGATTCharacteristic] = None
         self.connected = False
+        # Preallocated frame buffer, rewritten in place up to _pkt_len
+        self._pkt = bytearray(MAX_BATCH_SIZE)
+        self._pkt_view = memoryview(self._pkt)
+        self._pkt_len = 0
+        self._flush_task: Optional[asyncio.TimerHandle] = None
+        self._tx_queue: asyncio.Queue = asyncio.Queue(maxsize=TX_QUEUE_SIZE)
+        self._writer_task: Optional[asyncio.Task] = None
+        self._write_response = True
+        self._led_area_id: Optional[str] = None
         
     async def connect_ble(self, device_name: str = MICROBIT_NAME) -> bool:
         """Connect to micro:bit via BLE."""
         logger.info(f"🔍 Scanning for micro:bit: {device_name}")
         
-        # Scan for device
-        devices = await BleakScanner.discover(timeout=10.0)
-        target_device = None
-        
-        for device in devices:
-            if device_name.lower() in device.name.lower() if device.name else False:
-                target_device = device
-                logger.info(f"✅ Found micro:bit: {device.name} ({device.address})")
-                break
+        # Scan for device; returns as soon as a matching advertisement is seen
+        wanted = device_name.lower()
+        target_device = await BleakScanner.find_device_by_filter(
+            lambda device, adv: bool(device.name) and wanted in device.name.lower(),
+            timeout=10.0
+        )
         
         if not target_device:
             logger.error(f"❌ micro:bit '{device_name}' not found")
-            logger.info("Available devices:")
-            for d in devices:
-                logger.info(f"  - {d.name or 'Unknown'} ({d.address})")
             return False
         
+        logger.info(f"✅ Found micro:bit: {target_device.name} ({target_device.address})")
+        
         # Connect to device
         logger.info(f"🔌 Connecting to {target_device.address}...")
         self.ble_client = BleakClient(target_device)
@@ -88,7 +128,7 @@ class MicrobitBleAgent:
                     logger.info(f"✅ Found FEAGI service: {service.uuid}")
                     for char in service.characteristics:
                         logger.info(f"  Characteristic: {char.uuid} (properties: {char.properties})")
-                        if char.uuid.lower() == NEURON_DATA_CHAR_UUID.lower() and "write" in char.properties:
+                        if char.uuid.lower() == NEURON_DATA_CHAR_UUID.lower() and self._is_writable(char):
                             self.neuron_char = char
                             logger.info(f"✅ Found neuron data characteristic: {char.uuid}")
                             break
@@ -99,7 +139,7 @@ class MicrobitBleAgent:
                 for service in services:
                     if "6e400001" in service.uuid.lower():
                         for char in service.characteristics:
-                            if "write" in char.properties:
+                            if self._is_writable(char):
                                 self.neuron_char = char
                                 logger.info(f"✅ Using NUS TX characteristic: {char.uuid}")
                                 break
@@ -108,6 +148,13 @@ class MicrobitBleAgent:
                 logger.error("❌ No writable characteristic found")
                 return False
             
+            await self._negotiate_mtu()
+            
+            # Prefer write commands (no ATT round-trip) when the firmware allows them
+            self._write_response = "write-without-response" not in self.neuron_char.properties
+            if self._write_response:
+                logger.warning("⚠️  Characteristic does not support write-without-response; writes will be acknowledged")
+            
             self.connected = True
             return True
             
@@ -115,55 +162,150 @@ class MicrobitBleAgent:
             logger.error(f"❌ Failed to connect: {e}")
             return False
     
+    async def _negotiate_mtu(self):
+        """
+        Make sure the largest ATT MTU the platform allows is in effect.
+        
+        CoreBluetooth and WinRT exchange MTU automatically on connect, and
+        they pick the 2M PHY when both sides support it. BlueZ only reports
+        the real MTU after a characteristic has been acquired, so it is
+        requested explicitly. PHY selection is not exposed over BlueZ D-Bus.
+        """
+        acquire_mtu = getattr(getattr(self.ble_client, "_backend", None), "_acquire_mtu", None)
+        if acquire_mtu is not None:
+            try:
+                await acquire_mtu()
+            except Exception as e:
+                logger.debug(f"MTU acquisition not available: {e}")
+        
+        logger.info(f"📏 BLE MTU: {self.ble_client.mtu_size} bytes")
+    
+    @staticmethod
+    def _is_writable(char: BleakGATTCharacteristic) -> bool:
+        """Check whether a characteristic accepts either kind of write."""
+        return "write" in char.properties or "write-without-response" in char.properties
+    
     async def send_neuron_firing(self, coordinates: list):
         """
         Send neuron firing data to micro:bit.
         
         Packet format (from firmware bluetooth.rs):
         [0x01] [count] [x1, y1, x2, y2, ...]
+        
+        Replaces any pending frame and writes this one immediately.
         """
         if not self.connected or not self.neuron_char:
             logger.warning("⚠️  Not connected to micro:bit")
             return
         
-        # Limit to 25 neurons (5x5 matrix)
-        coords = coordinates[:25]
+        self.queue_neuron_firing(coordinates)
+        packet = self._take_batch()
+        if packet:
+            await self._tx_queue.put(packet)
+    
+    def queue_neuron_firing(self, coordinates: list):
+        """
+        Set the pending neuron firing frame, replacing any frame not yet sent.
+        
+        Each frame fully redraws the LED matrix and the firmware keeps a
+        single RX slot, so older frames in the flush window are stale.
+        """
+        # Limit to 25 neurons (5x5 matrix). Without acknowledged writes an
+        # oversized frame cannot be sent, so cap it to one MTU - 3 payload
+        max_count = 25
+        if "write" not in self.neuron_char.properties:
+            max_count = min(max_count, (self._batch_limit() - 2) // 2)
+        coords = coordinates[:max_count]
         count = len(coords)
         
-        # Build packet: [command=0x01] [count] [x1, y1, x2, y2, ...]
-        packet = bytearray([0x01, count])
-        for x, y in coords:
-            packet.extend([x, y])
+        # Rewrite the frame in place: [command=0x01] [count] [x1, y1, x2, y2, ...]
+        # (the coordinate pairs are flattened and copied in one C-level call)
+        end = 2 + count * 2
+        self._pkt_view[2:end] = bytes(chain.from_iterable(coords))
+        self._pkt[0] = 0x01
+        self._pkt[1] = count
+        self._pkt_len = end
+        
+        if self._flush_task is None:
+            loop = asyncio.get_running_loop()
+            self._flush_task = loop.call_later(BATCH_FLUSH_INTERVAL, self._flush)
+    
+    def _batch_limit(self) -> int:
+        """Largest payload that fits in one write at the negotiated MTU."""
+        return min(self.ble_client.mtu_size - ATT_HEADER_SIZE, MAX_BATCH_SIZE)
+    
+    def _take_batch(self) -> bytes:
+        """Detach the pending frame and cancel the flush timer."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        # Bleak needs an immutable snapshot; this is the only copy made
+        packet = bytes(self._pkt_view[:self._pkt_len])
+        self._pkt_len = 0
+        return packet
+    
+    def _flush(self):
+        """Hand the pending frame to the writer as one GATT write."""
+        packet = self._take_batch()
+        if not packet:
+            return
         
         try:
-            await self.ble_client.write_gatt_char(self.neuron_char, bytes(packet))
-            logger.debug(f"📤 Sent {count} neuron coordinates to micro:bit")
-        except Exception as e:
-            logger.error(f"❌ Failed to send neuron data: {e}")
+            self._tx_queue.put_nowait(packet)
+        except asyncio.QueueFull:
+            # Only the newest display state matters; drop the oldest frame
+            self._tx_queue.get_nowait()
+            self._tx_queue.put_nowait(packet)
+            logger.debug("TX queue full, dropped oldest neuron frame")
+    
+    async def _writer(self):
+        """Drain the TX queue, issuing writes back-to-back."""
+        while True:
+            packet = await self._tx_queue.get()
+            # Write commands cannot exceed MTU - 3 (BlueZ/WinRT reject or
+            # truncate them); a larger frame, e.g. at the default 23-byte
+            # MTU, goes out as an acknowledged long write instead
+            response = self._write_response or len(packet) > self._batch_limit()
+            try:
+                await self.ble_client.write_gatt_char(
+                    self.neuron_char, packet, response=response
+                )
+                logger.debug("📤 Sent %d bytes of neuron data to micro:bit", len(packet))
+            except Exception as e:
+                logger.error("❌ Failed to send neuron data: %s", e)
     
     def handle_motor_data(self, channel_id: str, data: bytes):
         """Handle motor data from FEAGI (neuron firing)."""
         try:
             # Parse JSON motor data from FEAGI
-            motor_json = json.loads(data)
+            motor_json = _json_loads(data)
             
             # Extract cortical areas
             cortical_areas = motor_json.get("cortical_areas", {})
             
+            # Fast path: the LED matrix area id resolved on an earlier frame
+            led_matrix_area = None
+            if self._led_area_id is not None:
+                led_matrix_area = cortical_areas.get(self._led_area_id)
+            
             # Look for LED Matrix cortical area (omis type)
             # Expected name: "LED Matrix" or "Display Matrix" or similar
-            led_matrix_area = None
-            for area_id, area_data in cortical_areas.items():
-                # Check if this is the LED matrix area (you may need to adjust the name)
-                if "led" in area_id.lower() or "matrix" in area_id.lower() or "display" in area_id.lower():
-                    led_matrix_area = area_data
-                    break
+            if not led_matrix_area:
+                for area_id, area_data in cortical_areas.items():
+                    # Check if this is the LED matrix area (you may need to adjust the name)
+                    area_name = area_id.lower()
+                    if "led" in area_name or "matrix" in area_name or "display" in area_name:
+                        self._led_area_id = area_id
+                        led_matrix_area = area_data
+                        break
             
             if not led_matrix_area:
                 # If no specific area found, use first area (for testing)
-                if cortical_areas:
-                    led_matrix_area = list(cortical_areas.values())[0]
-                    logger.debug(f"Using first cortical area: {list(cortical_areas.keys())[0]}")
+                first_area_id = next(iter(cortical_areas), None)
+                if first_area_id is not None:
+                    led_matrix_area = cortical_areas[first_area_id]
+                    logger.debug("Using first cortical area: %s", first_area_id)
             
             if not led_matrix_area:
                 return
@@ -177,20 +319,18 @@ class MicrobitBleAgent:
                 return
             
             # Convert to list of (x, y) tuples, filtering to 5x5 range
-            coordinates = []
-            for x, y in zip(xs, ys):
-                if 0 <= x < 5 and 0 <= y < 5:
-                    coordinates.append((x, y))
+            coordinates = [(x, y) for x, y in zip(xs, ys) if 0 <= x < 5 and 0 <= y < 5]
             
-            if coordinates:
-                # Send to micro:bit asynchronously
-                asyncio.create_task(self.send_neuron_firing(coordinates))
-                logger.info(f"🎯 Sending {len(coordinates)} neuron firings to micro:bit LED matrix")
+            if coordinates and self.connected:
+                # Coalesced for the micro:bit; the newest frame is flushed on the timer
+                self.queue_neuron_firing(coordinates)
+                logger.info("🎯 Sending %d neuron firings to micro:bit LED matrix", len(coordinates))
             
         except json.JSONDecodeError as e:
-            logger.error(f"❌ Failed to parse motor data: {e}")
+            self._led_area_id = None
+            logger.error("❌ Failed to parse motor data: %s", e)
         except Exception as e:
-            logger.error(f"❌ Error handling motor data: {e}")
+            logger.error("❌ Error handling motor data: %s", e)
     
     async def connect_feagi(self):
         """Connect to FEAGI Core."""
@@ -205,6 +345,7 @@ class MicrobitBleAgent:
             await self.feagi_client.connect()
             
             # Register motor callback for LED matrix control
+            self._led_area_id = None  # re-resolve the LED area per connection
             self.feagi_client.register_motor_callback(self.handle_motor_data)
             
             logger.info("✅ Connected to FEAGI Core")
@@ -220,6 +361,8 @@ class MicrobitBleAgent:
         if not await self.connect_ble():
             return
         
+        self._writer_task = asyncio.create_task(self._writer())
+        
         # Connect to FEAGI
         if not await self.connect_feagi():
             return
@@ -234,23 +377,28 @@ class MicrobitBleAgent:
         except KeyboardInterrupt:
             logger.info("🛑 Shutting down...")
         finally:
+            if self._writer_task:
+                self._writer_task.cancel()
             if self.ble_client:
                 await self.ble_client.disconnect()
             if self.feagi_client:
                 await self.feagi_client.disconnect()
 
 
-async def main():
-    """Main entry point."""
-    import argparse
-    
+@functools.cache
+def _arg_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser once and reuse it."""
     parser = argparse.ArgumentParser(description="FEAGI micro:bit BLE Agent")
     parser.add_argument("--feagi-host", default="localhost", help="FEAGI Core host")
     parser.add_argument("--agent-id", default="microbit-agent", help="Agent ID")
     parser.add_argument("--device-name", default=MICROBIT_NAME, help="micro:bit device name")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
-    
-    args = parser.parse_args()
+    return parser
+
+
+async def main():
+    """Main entry point."""
+    args = _arg_parser().parse_args()
     
     # Setup logging
     log_level = logging.DEBUG if args.verbose else logging.INFO
@@ -266,6 +414,8 @@ async def main():
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
 
 
@@ -24,6 +24,8 @@ pub const NUS_RX_CHAR_UUID: Uuid = Uuid::new_long([
 const CONNECTIONS_MAX: usize = 1;
 const L2CAP_CHANNELS_MAX: usize = 3;
 const L2CAP_MTU: usize = 247;
+/// Largest ATT write payload at L2CAP_MTU (3-byte ATT header)
+const NUS_RX_LEN: usize = L2CAP_MTU - 3;
 const ATT_TABLE_SIZE: usize = 20;
 const ADV_SETS: usize = 1;
 
@@ -136,10 +138,11 @@ impl BleStack {
                 .build();
             
             // NUS RX Characteristic (Write) - client sends data to micro:bit
-            // We need static storage for RX value
-            static NUS_RX_VALUE: StaticCell<[u8; 20]> = StaticCell::new();
-            let nus_rx_value = NUS_RX_VALUE.init([0u8; 20]);
-            let nus_rx_initial: [u8; 20] = [0u8; 20];
+            // We need static storage for RX value, sized for a full-MTU write
+            // so batched neuron packets are not truncated after MTU exchange
+            static NUS_RX_VALUE: StaticCell<[u8; NUS_RX_LEN]> = StaticCell::new();
+            let nus_rx_value = NUS_RX_VALUE.init([0u8; NUS_RX_LEN]);
+            let nus_rx_initial: [u8; NUS_RX_LEN] = [0u8; NUS_RX_LEN];
             let nus_rx_handle = nus_service
                 .add_characteristic(
                     NUS_RX_CHAR_UUID,
@@ -10,8 +10,40 @@ Copyright 2016-2025 Neuraville Inc. All Rights Reserved.
 
 import asyncio
 import argparse
+import functools
+import struct
 from feagi.agent import BluetoothRobot
 
+# uvloop (libuv event loop) speeds up BLE notification handling where it is
+# installed; Windows and minimal installs use the default asyncio loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+# Binary gyro frame: [type:u8][x:i16][y:i16][z:i16], little-endian, axes in
+# hundredths of a degree per second.
+_GYRO_TYPE = 0x01
+_GYRO_FMT = struct.Struct('<Bhhh')
+
+_GYRO_SCALE = 1.0 / 100.0
+
+# Every byte that cannot appear in an ASCII float; stripped with one
+# bytes.translate() call instead of a per-character Python filter
+_NON_NUMERIC = bytes(b for b in range(256) if b not in b'.-0123456789')
+
+
+def _decode_gyro(raw_bytes: bytes) -> dict:
+    _, x, y, z = _GYRO_FMT.unpack_from(raw_bytes)
+    return {
+        'gyro': {
+            '0': x * _GYRO_SCALE,  # X
+            '1': y * _GYRO_SCALE,  # Y
+            '2': z * _GYRO_SCALE   # Z
+        }
+    }
+
 
 class BittleRobot(BluetoothRobot):
     """
@@ -21,6 +53,9 @@ class BittleRobot(BluetoothRobot):
     All BLE and FEAGI complexity handled by SDK.
     """
     
+    # No instance attributes of its own; all state lives in BluetoothRobot
+    __slots__ = ()
+    
     # Bluetooth configuration (from embodiment.json)
     BLUETOOTH_CONFIG = {
         "device_name": "Bittle",
@@ -46,22 +81,28 @@ class BittleRobot(BluetoothRobot):
         """
         Parse Bittle's sensor data.
         
-        Bittle sends gyro data as: "x,y,z#"
+        Bittle sends gyro data as a binary frame: [0x01][x:i16][y:i16][z:i16]
+        
+        Older firmware sends ASCII instead, which is still accepted: "x,y,z#"
         """
+        if len(raw_bytes) == _GYRO_FMT.size and raw_bytes[0] == _GYRO_TYPE:
+            return _decode_gyro(raw_bytes)
+        
+        return self._parse_text_sensors(raw_bytes)
+    
+    def _parse_text_sensors(self, raw_bytes: bytes) -> dict:
+        """Parse the legacy ASCII gyro format ("x,y,z#")."""
         try:
-            data_str = raw_bytes.decode('utf-8').strip()
-            
-            # Handle gyro data (format: "x,y,z#")
-            if '#' in data_str:
-                # Clean and split
-                data_str = data_str.replace('\r', '').replace('\n', '')
-                values_str = data_str.split('#')[0]
-                values = values_str.split(',')
+            # Handle gyro data (format: "x,y,z#"); line endings and other
+            # garbage are dropped per token by _NON_NUMERIC below
+            head, sep, _ = raw_bytes.partition(b'#')
+            if sep:
+                values = head.split(b',')
                 
-                # Parse floats
+                # Parse floats (float() accepts bytes, no decode needed)
                 gyro_data = []
                 for val in values:
-                    clean_val = ''.join(c for c in val if c in '.-0123456789')
+                    clean_val = val.translate(None, _NON_NUMERIC)
                     if clean_val:
                         gyro_data.append(float(clean_val))
                 
@@ -76,7 +117,7 @@ class BittleRobot(BluetoothRobot):
                     }
         
         except Exception as e:
-            self.logger.warning(f"Error parsing sensor data: {e}")
+            self.logger.warning("Error parsing sensor data: %s", e)
         
         return {}
     
@@ -89,34 +130,39 @@ class BittleRobot(BluetoothRobot):
         try:
             # Check for servo commands
             if 'servo' in feagi_output:
-                command = "i"
+                servo_map = self.SERVO_MAP
+                parts = ["i"]
                 
                 for feagi_id, angle in feagi_output['servo'].items():
                     # Map FEAGI ID to Bittle servo ID
-                    bittle_id = self.SERVO_MAP.get(int(feagi_id))
+                    bittle_id = servo_map.get(int(feagi_id))
                     if bittle_id is not None:
                         # Bittle expects angles offset by -90
-                        bittle_angle = int(angle) - 90
-                        command += f" {bittle_id} {bittle_angle}"
+                        parts.append(f"{bittle_id} {int(angle) - 90}")
                 
-                if len(command) > 1:  # More than just "i"
-                    return command.encode()
+                if len(parts) > 1:  # More than just "i"
+                    return " ".join(parts).encode()
         
         except Exception as e:
-            self.logger.warning(f"Error formatting motor command: {e}")
+            self.logger.warning("Error formatting motor command: %s", e)
         
         return b''
 
 
-def main():
-    """Main entry point"""
+@functools.cache
+def _arg_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser once and reuse it."""
     parser = argparse.ArgumentParser(description="Bittle X Bluetooth Controller")
     parser.add_argument('--agent-id', default='bittle-001', help='Agent ID')
     parser.add_argument('--feagi-host', default='localhost', help='FEAGI host')
     parser.add_argument('--feagi-port', type=int, default=3000, help='FEAGI port')
     parser.add_argument('--platform', choices=['desktop', 'cloud'], help='Platform override')
-    
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """Main entry point"""
+    args = _arg_parser().parse_args()
     
     # Create and run robot
     robot = BittleRobot(
@@ -127,6 +173,8 @@ def main():
     )
     
     # Run async
+    if uvloop is not None:
+        uvloop.install()
     try:
         asyncio.run(robot.run())
     except KeyboardInterrupt:
@@ -114,15 +114,15 @@ def main():
             if feagi_ok:
                 # Send sensor data to FEAGI (every 10 frames to reduce bandwidth)
                 if frame_number % 10 == 0:
-                try:
-                    # Convert joint positions to neuron activations (skip first 7 DOF - free joint)
-                    neuron_pairs = []
-                    for i in range(8):
-                        neuron_id = i
-                        qpos_idx = i + 7  # Skip free joint (7 DOF)
-                        if qpos_idx < len(data.qpos):
-                            potential = float(data.qpos[qpos_idx] * 50.0)  # Scale to reasonable range
-                            neuron_pairs.append((neuron_id, potential))
+                    try:
+                        # Convert joint positions to neuron activations (skip first 7 DOF - free joint)
+                        neuron_pairs = []
+                        for i in range(8):
+                            neuron_id = i
+                            qpos_idx = i + 7  # Skip free joint (7 DOF)
+                            if qpos_idx < len(data.qpos):
+                                potential = float(data.qpos[qpos_idx] * 50.0)  # Scale to reasonable range
+                                neuron_pairs.append((neuron_id, potential))
                         
                         feagi_client.send_sensory_data(neuron_pairs)
                     except Exception as e:
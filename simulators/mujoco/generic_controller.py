@@ -7,6 +7,8 @@ Copyright 2016-2025 Neuraville Inc.
 import sys
 import time
 import argparse
+import functools
+import threading
 import numpy as np
 import mujoco
 import mujoco.viewer
@@ -14,9 +16,46 @@ import mujoco.viewer
 # Configuration
 RUNTIME = float('inf')
 SPEED = 120
-
-
-def main():
+# Physics steps per mj_step(..., nstep=N) call on the physics thread
+STEPS_PER_BATCH = 4
+# Viewer refresh rate on the main thread, independent of the physics rate
+DISPLAY_HZ = 60
+
+
+class PhysicsWorker(threading.Thread):
+    """Steps the simulation in nstep batches, paced to SPEED steps/second."""
+
+    def __init__(self, model, data, viewer):
+        super().__init__(name="mujoco-physics", daemon=True)
+        self.model = model
+        self.data = data
+        self.viewer = viewer
+        self.frame_number = 0
+        self.stop_event = threading.Event()
+
+    def run(self):
+        period = STEPS_PER_BATCH / SPEED
+        deadline = time.perf_counter()
+
+        while not self.stop_event.is_set():
+            # viewer.lock() keeps sync() from reading data mid-step; mj_step
+            # releases the GIL, so the main thread keeps running meanwhile
+            with self.viewer.lock():
+                mujoco.mj_step(self.model, self.data, nstep=STEPS_PER_BATCH)
+            self.frame_number += STEPS_PER_BATCH
+
+            # Absolute schedule; wait() also wakes immediately on stop
+            deadline += period
+            now = time.perf_counter()
+            if deadline > now:
+                self.stop_event.wait(deadline - now)
+            else:
+                deadline = now  # overran; don't try to catch up in a burst
+
+
+@functools.cache
+def _arg_parser():
+    """Build the command-line parser once and reuse it."""
     parser = argparse.ArgumentParser(description='Generic MuJoCo Controller for FEAGI')
     parser.add_argument('--ip', default='127.0.0.1', help='FEAGI IP address')
     parser.add_argument('--port', type=int, default=8000, help='FEAGI HTTP port')
@@ -24,7 +63,11 @@ def main():
     parser.add_argument('--agent_id', required=True, help='Unique agent ID for FEAGI registration')
     parser.add_argument('--cortical_input', default='iic400', help='Cortical area for sensory input')
     parser.add_argument('--cortical_output', default='o_motor', help='Cortical area for motor output')
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    args = _arg_parser().parse_args()
 
     print("🚀 Generic MuJoCo Controller (FEAGI Python SDK)")
     print(f"📍 FEAGI: {args.ip}:{args.port}")
@@ -86,34 +129,40 @@ def main():
         print("   You can manually move joints with the mouse")
         print("   Physics simulation runs at 120 FPS")
 
-        start_time = time.time()
-        frame_number = 0
-
-        while viewer.is_running() and time.time() - start_time < RUNTIME:
-            step_start = time.time()
-
-            # Step simulation
-            mujoco.mj_step(model, data)
-
-            # Log every 120 frames (1 second at 120Hz)
-            if frame_number % 120 == 0:
-                elapsed = time.time() - start_time
-                print(f"🔄 Frame {frame_number} | Time: {elapsed:.1f}s | Standalone mode")
-
-            # Sync viewer
-            viewer.sync()
-
-            # Maintain simulation speed
-            elapsed = time.time() - step_start
-            sleep_time = (1.0 / SPEED) - elapsed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-
-            frame_number += 1
+        physics = PhysicsWorker(model, data, viewer)
+        sync_period = 1.0 / DISPLAY_HZ
+        start_time = time.perf_counter()
+        deadline = start_time
+        log_countdown = 1  # log the first sync, then once per second
+        physics.start()
+
+        try:
+            while viewer.is_running() and time.perf_counter() - start_time < RUNTIME:
+                # Sync viewer at display rate; physics overlaps on its own thread
+                viewer.sync()
+
+                # Log once per second
+                log_countdown -= 1
+                if not log_countdown:
+                    log_countdown = DISPLAY_HZ
+                    elapsed = time.perf_counter() - start_time
+                    print(f"🔄 Frame {physics.frame_number} | Time: {elapsed:.1f}s | Standalone mode")
+
+                deadline += sync_period
+                now = time.perf_counter()
+                if deadline > now:
+                    time.sleep(deadline - now)
+                else:
+                    deadline = now
+        finally:
+            physics.stop_event.set()
+            physics.join()
+
+        frame_number = physics.frame_number
 
         print(f"\n🛑 Simulation ended")
         print(f"   Total frames: {frame_number}")
-        print(f"   Total time: {time.time() - start_time:.1f}s")
+        print(f"   Total time: {time.perf_counter() - start_time:.1f}s")
 
     print("👋 MuJoCo controller shutdown complete")
     return 0
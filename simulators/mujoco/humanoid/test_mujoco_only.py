@@ -29,31 +29,38 @@ def main():
         print("   Press ESC in the viewer window to exit")
         
         frame_number = 0
-        start_time = time.time()
         RUNTIME = 300.0  # 5 minutes
         SPEED = 120  # Hz
+        STEPS_PER_SYNC = 4  # physics steps per viewer sync
+        period = STEPS_PER_SYNC / SPEED
+        batches_per_second = SPEED // STEPS_PER_SYNC
+        start_time = time.perf_counter()
+        deadline = start_time
+        log_countdown = 1  # log the first frame, then once per second
         
-        while viewer.is_running() and time.time() - start_time < RUNTIME:
-            step_start = time.time()
-            
-            # Step simulation
-            mujoco.mj_step(model, data)
+        while viewer.is_running() and time.perf_counter() - start_time < RUNTIME:
+            # Step simulation (a batch of steps per Python/C crossing)
+            mujoco.mj_step(model, data, nstep=STEPS_PER_SYNC)
             
             # Log every 120 frames (1 second at 120Hz)
-            if frame_number % 120 == 0:
-                elapsed = time.time() - start_time
+            log_countdown -= 1
+            if not log_countdown:
+                log_countdown = batches_per_second
+                elapsed = time.perf_counter() - start_time
                 print(f"🔄 Frame {frame_number} | Time: {elapsed:.1f}s | Running OK")
             
             # Sync viewer
             viewer.sync()
             
-            # Maintain simulation speed
-            elapsed = time.time() - step_start
-            sleep_time = (1.0 / SPEED) - elapsed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            # Maintain simulation speed against an absolute schedule
+            deadline += period
+            now = time.perf_counter()
+            if deadline > now:
+                time.sleep(deadline - now)
+            else:
+                deadline = now  # overran; don't try to catch up in a burst
             
-            frame_number += 1
+            frame_number += STEPS_PER_SYNC
         
         print(f"🛑 Simulation ended. Total frames: {frame_number}")
     
@@ -3,9 +3,14 @@
 MuJoCo Reacher Controller - Using FEAGI Python SDK
 Copyright 2016-2025 Neuraville Inc.
 """
+import os
+import math
 import sys
 import time
 import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import mujoco
 import mujoco.viewer
@@ -21,7 +26,243 @@ except ImportError:
 
 # Configuration
 RUNTIME = float('inf')
-SPEED = 120
+SPEED = 120  # physics steps per second
+# Physics substeps run in C per control frame; FEAGI/viewer work runs at SPEED_HZ
+SUBSTEPS_PER_CONTROL = 4
+SPEED_HZ = SPEED // SUBSTEPS_PER_CONTROL
+# Viewer redraw cap (Hz); sync is skipped on frames beyond this rate
+DISPLAY_HZ = 60
+# Sensor data is sent every this many control frames (10 Hz at 30 Hz)
+SENSOR_EVERY = 3
+SENSOR_SCALE = 50.0  # joint position -> neuron potential
+# Upper bound on queued motor messages drained per I/O poll
+MAX_MOTOR_DRAIN = 32
+# Reusable (neuron id, potential) records for the sensory payload
+SENSOR_DT = np.dtype([('id', '<i4'), ('pot', '<f8')])
+
+
+def encode_and_apply(qpos, ctrl, ctrl_batch, dirty, n_in, n_out, scale, out_pots):
+    """
+    Per-frame numeric kernel: scale the first n_in joint positions straight
+    into the out_pots payload field, and copy the staged motor commands
+    (ctrl_batch where dirty) into ctrl in one contiguous masked copy when
+    n_out is nonzero. Either half is skipped when its count is 0. Works in
+    place, no allocation.
+    """
+    if n_in:
+        np.multiply(qpos[:n_in], scale, out=out_pots[:n_in])
+    if n_out:
+        np.copyto(ctrl, ctrl_batch, where=dirty)
+
+
+def make_frame_kernel(n_sensors):
+    """
+    Return encode_and_apply specialized for n_sensors. The stock 2-joint
+    reacher gets straight-line scalar encoding, which beats a ufunc call on
+    2-element slices; other models use the generic kernel.
+    """
+    if n_sensors != 2:
+        return encode_and_apply
+
+    def encode_and_apply_2(qpos, ctrl, ctrl_batch, dirty, n_in, n_out, scale, out_pots):
+        if n_in:
+            q0, q1 = qpos[:2].tolist()
+            out_pots[0] = q0 * scale
+            out_pots[1] = q1 * scale
+        if n_out:
+            np.copyto(ctrl, ctrl_batch, where=dirty)
+
+    return encode_and_apply_2
+
+
+def stage_motor_commands(motor_data, actuator_keys, nu, ctrl_batch, dirty):
+    """
+    Write a FEAGI motor message's valid commands into ctrl_batch, flag the
+    touched actuators in dirty, and return how many were staged. Actuator
+    keys are parsed to ints once and memoized in actuator_keys.
+    """
+    dirty[:] = False
+    n = 0
+    if isinstance(motor_data, dict):
+        motor_commands = motor_data.get("motor_commands", {})
+        for actuator_id_str, command in motor_commands.items():
+            actuator_id = actuator_keys.get(actuator_id_str)
+            if actuator_id is None:
+                actuator_id = actuator_keys[actuator_id_str] = int(actuator_id_str)
+            if 0 <= actuator_id < nu:
+                ctrl_batch[actuator_id] = command
+                dirty[actuator_id] = True
+                n += 1
+    return n
+
+
+class FeagiIOWorker(threading.Thread):
+    """
+    Runs FEAGI send/receive on a background thread so mj_step never waits on
+    the network. Both directions are conflated to the newest message: the
+    simulation loop overwrites sensor_box and picks up the latest motor
+    command from motor_box; single-slot deques are thread-safe without extra
+    locking. sensor_ready and motor_ready are set whenever a new message
+    lands, so each side can wake as soon as there is work.
+    """
+
+    def __init__(self, feagi_client):
+        super().__init__(name="feagi-io", daemon=True)
+        self._send = feagi_client.send_sensory_data
+        self._recv = feagi_client.receive_motor_data
+        self.sensor_box = deque(maxlen=1)
+        self.sensor_ready = threading.Event()
+        self.motor_box = deque(maxlen=1)
+        self.motor_ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.failed = threading.Event()  # set once a send has failed
+
+    def run(self):
+        poll_interval = 1.0 / SPEED_HZ
+        last_error_log = 0.0
+
+        while not self.stop_event.is_set():
+            # Wait for a sensor sample, but poll motor data at least every frame
+            neuron_pairs = None
+            if self.sensor_ready.wait(poll_interval):
+                self.sensor_ready.clear()
+                try:
+                    neuron_pairs = self.sensor_box.popleft()
+                except IndexError:
+                    pass
+
+            if neuron_pairs is not None:
+                try:
+                    self._send(neuron_pairs)
+                except Exception as e:
+                    print(f"❌ FEAGI send failed: {e}")
+                    print(f"   Continuing MuJoCo simulation without FEAGI")
+                    self.failed.set()  # Disable FEAGI communication
+                    return
+
+            try:
+                # Drain everything queued and keep only the newest
+                # command so setpoints never lag behind FEAGI
+                motor_data = None
+                for _ in range(MAX_MOTOR_DRAIN):
+                    message = self._recv()
+                    if not message:
+                        break
+                    motor_data = message
+                if motor_data:
+                    self.motor_box.append(motor_data)
+                    self.motor_ready.set()
+            except Exception as e:
+                now = time.perf_counter()
+                if now - last_error_log >= 1.0:  # Log occasionally
+                    last_error_log = now
+                    print(f"⚠️ FEAGI receive error: {e}")
+
+
+class ParallelRollout:
+    """
+    Batch-steps many copies of the model for planning/evaluation workloads
+    (e.g. MPC). Rollouts are split across a thread pool with one MjData per
+    worker; MuJoCo's native rollout releases the GIL, so workers run on
+    separate cores.
+    """
+
+    def __init__(self, model, nthread):
+        # Imported here so the interactive mode also runs on MuJoCo builds
+        # without the rollout module
+        from mujoco import rollout
+        self._rollout = rollout.rollout
+        self.state_spec = mujoco.mjtState.mjSTATE_FULLPHYSICS
+        self.model = model
+        self.nthread = max(1, nthread)
+        self.nstate = mujoco.mj_stateSize(model, self.state_spec)
+        self.datas = [mujoco.MjData(model) for _ in range(self.nthread)]
+        self.pool = ThreadPoolExecutor(max_workers=self.nthread)
+
+    def get_state(self, data):
+        """Full physics state of data as a flat vector, for use as an initial state."""
+        state = np.empty(self.nstate)
+        mujoco.mj_getState(self.model, data, state, self.state_spec)
+        return state
+
+    def rollout(self, initial_state, control):
+        """
+        initial_state: (nroll, nstate), control: (nroll, nstep, nu).
+        Returns the visited states as (nroll, nstep, nstate).
+        """
+        nroll, nstep = control.shape[:2]
+        states = np.empty((nroll, nstep, self.nstate))
+        bounds = np.linspace(0, nroll, self.nthread + 1).astype(int)
+
+        def run_chunk(i):
+            lo, hi = bounds[i], bounds[i + 1]
+            if lo < hi:
+                self._rollout(self.model, self.datas[i], initial_state[lo:hi],
+                              control[lo:hi], state=states[lo:hi])
+
+        # list() surfaces any worker exception here
+        list(self.pool.map(run_chunk, range(self.nthread)))
+        return states
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def run_parallel(model, data, n_envs):
+    """Headless mode: roll n_envs copies of the model one second ahead."""
+    nthread = min(n_envs, max(1, (os.cpu_count() or 2) // 2))
+    pool = ParallelRollout(model, nthread)
+    try:
+        initial_state = np.tile(pool.get_state(data), (n_envs, 1))
+        control = np.zeros((n_envs, SPEED, model.nu))
+        print(f"🧮 Rolling out {n_envs} environments on {nthread} threads...")
+        t0 = time.perf_counter()
+        states = pool.rollout(initial_state, control)
+        elapsed = time.perf_counter() - t0
+        total_steps = n_envs * SPEED
+        print(f"✅ {total_steps} steps in {elapsed:.3f}s ({total_steps / elapsed:.0f} steps/s)")
+        return states
+    finally:
+        pool.close()
+
+
+def tune_control_thread(cpu_core=None, realtime=False):
+    """
+    Pin the calling (simulation) thread to one core and raise its scheduling
+    priority. Linux-only and best-effort: anything the OS or the current
+    privileges refuse is reported and the loop runs with default scheduling.
+    Threads started after this call inherit the settings.
+    """
+    if cpu_core is not None:
+        try:
+            os.sched_setaffinity(0, {cpu_core})
+            print(f"📌 Control thread pinned to CPU {cpu_core}")
+        except AttributeError:
+            print("⚠️ CPU pinning not supported on this platform")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not pin to CPU {cpu_core}: {e}")
+
+    if realtime:
+        # SCHED_FIFO needs root/CAP_SYS_NICE; fall back to a nice bump
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(10))
+            print("⏱️ Control thread running with SCHED_FIFO priority 10")
+            return
+        except (AttributeError, OSError):
+            pass
+        try:
+            os.nice(-10)
+            print("⏱️ Control thread niceness raised by 10")
+        except (AttributeError, OSError) as e:
+            print(f"⚠️ Could not raise priority (run as root or grant CAP_SYS_NICE): {e}")
+
+
+def positive_float(value):
+    """argparse type for a float that must be > 0."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be > 0, got {value}")
+    return number
 
 
 def main():
@@ -29,6 +270,15 @@ def main():
     parser.add_argument('--ip', default='127.0.0.1', help='FEAGI IP address')
     parser.add_argument('--port', type=int, default=8000, help='FEAGI HTTP port')
     parser.add_argument('--model_xml_path', default='./reacher.xml', help='MuJoCo model path')
+    parser.add_argument('--cpu_core', type=int, default=None,
+                        help='Pin the simulation loop to this CPU core (avoid core 0, it services IRQs)')
+    parser.add_argument('--display_hz', type=positive_float, default=DISPLAY_HZ,
+                        help=f'Maximum viewer refresh rate; the control loop runs at {SPEED_HZ} Hz, '
+                             f'so only values below {SPEED_HZ} have an effect (physics rate is unaffected)')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help='Headless batch rollout of N environments (no viewer/FEAGI); 1 = interactive mode')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Raise simulation loop priority (SCHED_FIFO as root, else nice -10)')
     args = parser.parse_args()
 
     print("🚀 MuJoCo Reacher Controller (FEAGI Python SDK)")
@@ -44,6 +294,14 @@ def main():
         print(f"❌ Failed to load model: {e}")
         return 1
     
+    if args.parallel > 1:
+        try:
+            run_parallel(model, data, args.parallel)
+        except ImportError as e:
+            print(f"❌ --parallel needs mujoco.rollout: {e}")
+            return 1
+        return 0
+    
     # Create FEAGI client - REQUIRED (no fallback)
     if not SDK_AVAILABLE:
         print("❌ FEAGI SDK not installed")
@@ -93,73 +351,156 @@ def main():
         print("   Press ESC in the viewer window to exit")
         print("   MuJoCo will run even if FEAGI communication fails")
         
-        start_time = time.time()
         frame_number = 0
+        # Countdowns replace per-frame modulo checks; 1 fires on the first frame
+        log_ctr = 1
+        send_ctr = 1
+        sync_ctr = 1
+        # Never redraw faster than the display can show
+        sync_every = max(1, math.ceil(SPEED_HZ / args.display_hz))
+        
+        # FEAGI network I/O runs on its own thread
+        feagi_io = FeagiIOWorker(feagi_client)
+        motor_box = feagi_io.motor_box
+        _io_failed = feagi_io.failed.is_set
+        _pop_motor = motor_box.popleft
+        _put_sensor = feagi_io.sensor_box.append
+        _sensor_ready = feagi_io.sensor_ready.set
+        _motor_wait = feagi_io.motor_ready.wait
+        _motor_clear = feagi_io.motor_ready.clear
+        
+        # Bind hot callables once so the loop body uses fast local lookups
+        _stage = stage_motor_commands
+        _step = mujoco.mj_step
+        _pc = time.perf_counter
+        _sync = viewer.sync
+        _running = viewer.is_running
+        # qpos/ctrl are views into MjData whose identity is stable across mj_step
+        qpos = data.qpos
+        ctrl = data.ctrl
+        
+        # Sensor encoding buffers, sized once for the model
+        n_sensors = min(2, model.nq)
+        _kernel = make_frame_kernel(n_sensors)
+        sensor_buf = np.zeros(n_sensors, dtype=SENSOR_DT)
+        sensor_buf['id'] = np.arange(n_sensors)
+        sensor_pots = sensor_buf['pot']
+        
+        # Motor dispatch: FEAGI actuator keys are parsed to ints once, and
+        # commands are staged in a persistent ctrl-shaped batch so data.ctrl
+        # gets one masked copyto (untouched actuators keep their value)
+        nu = model.nu
+        actuator_keys = {}
+        ctrl_batch = data.ctrl.copy()
+        dirty = np.zeros(nu, dtype=bool)
         
         print("🔄 Starting simulation loop...")
 
-        while viewer.is_running() and time.time() - start_time < RUNTIME:
-            step_start = time.time()
-            
-            # Step simulation
-            mujoco.mj_step(model, data)
+        # Fixed-timestep schedule on the monotonic clock
+        period = 1.0 / SPEED_HZ
+        start_time = _pc()
+        next_t = start_time
+        feagi_io.start()
+        
+        # Tune scheduling after the I/O thread exists so only the
+        # simulation loop is pinned and prioritized
+        if args.cpu_core is not None or args.realtime:
+            tune_control_thread(args.cpu_core, args.realtime)
+
+        while _running() and _pc() - start_time < RUNTIME:
+            # Step simulation: several substeps per binding call
+            _step(model, data, nstep=SUBSTEPS_PER_CONTROL)
             
-            # Debug: Log every 120 frames (1 second at 120Hz) to show loop is running
-            if frame_number % 120 == 0:
-                elapsed = time.time() - start_time
+            # Debug: Log once per second of control frames to show loop is running
+            log_ctr -= 1
+            log_now = not log_ctr
+            if log_now:
+                log_ctr = SPEED_HZ
+                elapsed = _pc() - start_time
                 status = "✅ FEAGI OK" if feagi_ok else "⚠️ FEAGI offline (MuJoCo still running)"
                 print(f"🔄 Frame {frame_number} | {elapsed:.1f}s | {status}")
             
             # Try FEAGI communication (but don't block simulation if it fails)
             if feagi_ok:
-                # Send sensor data to FEAGI (every 10 frames to reduce bandwidth)
-                if frame_number % 10 == 0:
-                try:
-                    # Convert joint positions to neuron activations
-                    neuron_pairs = []
-                    for i in range(min(2, len(data.qpos))):
-                        neuron_id = i
-                        potential = float(data.qpos[i] * 50.0)  # Scale to reasonable range
-                        neuron_pairs.append((neuron_id, potential))
-                        
-                        feagi_client.send_sensory_data(neuron_pairs)
-                    except Exception as e:
-                        print(f"❌ FEAGI send failed: {e}")
-                        print(f"   Continuing MuJoCo simulation without FEAGI")
-                        feagi_ok = False  # Disable FEAGI communication
+                if _io_failed():
+                    feagi_ok = False  # I/O thread gave up after a send failure
+                else:
+                    # Send sensor data to FEAGI (every few frames to reduce bandwidth)
+                    send_ctr -= 1
+                    if send_ctr:
+                        n_in = 0
+                    else:
+                        send_ctr = SENSOR_EVERY
+                        n_in = n_sensors
+                    n_out = 0
                 
-                # Receive motor commands from FEAGI (non-blocking)
-                if feagi_ok:  # Only try if send succeeded
+                    # Stage the newest motor command received by the I/O thread
                     try:
-                        motor_data = feagi_client.receive_motor_data()
-                        if motor_data:
-                            # Apply motor commands to actuators
-                            if isinstance(motor_data, dict):
-                                motor_commands = motor_data.get("motor_commands", {})
-                                for actuator_id_str, command in motor_commands.items():
-                                    actuator_id = int(actuator_id_str)
-                                    if actuator_id < len(data.ctrl):
-                                        data.ctrl[actuator_id] = command
-                    except Exception as e:
-                        if frame_number % 120 == 0:  # Log occasionally
-                            print(f"⚠️ FEAGI receive error: {e}")
+                        motor_data = _pop_motor()
+                    except IndexError:
+                        motor_data = None
+                
+                    if motor_data:
+                        try:
+                            n_out = _stage(motor_data, actuator_keys, nu, ctrl_batch, dirty)
+                        except Exception as e:
+                            n_out = 0
+                            if log_now:  # Log occasionally
+                                print(f"⚠️ Invalid FEAGI motor command: {e}")
+                
+                    # Encode joint positions to neuron potentials and apply motor
+                    # commands to actuators in one vectorized call
+                    if n_in or n_out:
+                        _kernel(qpos, ctrl, ctrl_batch, dirty, n_in, n_out, SENSOR_SCALE, sensor_pots)
+                
+                    if n_in:
+                        # tolist() snapshots the buffer as (id, pot) tuples;
+                        # an unsent older sample is replaced, never queued
+                        _put_sensor(sensor_buf.tolist())
+                        _sensor_ready()
             
-            # Sync viewer
-            viewer.sync()
+            # Sync viewer, capped at the display rate
+            sync_ctr -= 1
+            if not sync_ctr:
+                sync_ctr = sync_every
+                _sync()
             
-            # Maintain simulation speed
-            elapsed = time.time() - step_start
-            sleep_time = (1.0 / SPEED) - elapsed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            # Maintain simulation speed against absolute deadlines. Wait on
+            # the I/O thread's motor signal instead of sleeping blind, so a
+            # command that arrives mid-wait reaches data.ctrl immediately
+            next_t += period
+            delay = next_t - _pc()
+            if delay <= 0:
+                next_t = _pc()  # overran; resync instead of bursting to catch up
+            while delay > 0 and _motor_wait(delay):
+                _motor_clear()
+                try:
+                    motor_data = _pop_motor()
+                except IndexError:
+                    motor_data = None  # already applied on the frame path
+                if motor_data and feagi_ok:
+                    try:
+                        n_out = _stage(motor_data, actuator_keys, nu, ctrl_batch, dirty)
+                        if n_out:
+                            _kernel(qpos, ctrl, ctrl_batch, dirty, 0, n_out, SENSOR_SCALE, sensor_pots)
+                    except Exception as e:
+                        if log_now:  # Log occasionally
+                            print(f"⚠️ Invalid FEAGI motor command: {e}")
+                delay = next_t - _pc()
             
-            frame_number += 1
+            frame_number += SUBSTEPS_PER_CONTROL  # counts physics steps, like the other MuJoCo scripts
         
+        feagi_io.stop_event.set()
+        feagi_io.join(timeout=2.0)
         print(f"🛑 Simulation loop ended. Total frames: {frame_number}")
     
-    # Cleanup
-    feagi_client.disconnect()
-    print("✅ Disconnected from FEAGI")
+    # Cleanup: the ZMQ sockets must not be closed while the I/O thread may
+    # still be using them; a stuck worker is a daemon and dies with the process
+    if feagi_io.is_alive():
+        print("⚠️ FEAGI I/O thread did not stop; skipping disconnect")
+    else:
+        feagi_client.disconnect()
+        print("✅ Disconnected from FEAGI")
     
     print("👋 Shutdown complete")
     return 0